@@ -1,19 +1,21 @@
 """
 Vercel Serverless Function Entry Point
-Exports Flask app for Vercel deployment
+Exports the ASGI app for Vercel deployment
 
 This file should be at the root /api directory for Vercel to recognize it as a serverless function.
-Routes all backend requests through the Flask app.
+Routes all backend requests through the FastAPI app.
 """
 
 import sys
 import os
 
-# Add backend to Python path
-backend_path = os.path.join(os.path.dirname(__file__), '..', 'backend')
-sys.path.insert(0, backend_path)
+# Add backend to Python path (guarded so re-imports on a warm lambda
+# don't keep prepending duplicate entries)
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
 
-# Import Flask app from backend
+# Import FastAPI app from backend
 from main import app
 
 # Export for Vercel
@@ -52,19 +52,22 @@ class AgentConfig:
         },
     }
 
+    # Precomputed at class-definition time so hot-path lookups are a
+    # single hashed indexing instead of chained dict .get calls
+    _USE_LLM_MAP = {role: cfg["use_llm"] for role, cfg in AGENTS.items()}
+    _MODEL_MAP = {role: cfg.get("model") or "python" for role, cfg in AGENTS.items()}
+
     @staticmethod
     def get_agent_config(role: AgentRole) -> dict:
         """Get configuration for a specific agent role"""
         return AgentConfig.AGENTS.get(role, {})
 
-    @staticmethod
-    def should_use_llm(role: AgentRole) -> bool:
+    @classmethod
+    def should_use_llm(cls, role: AgentRole) -> bool:
         """Determine if agent should use LLM or pure Python"""
-        config = AgentConfig.get_agent_config(role)
-        return config.get("use_llm", False)
+        return cls._USE_LLM_MAP.get(role, False)
 
-    @staticmethod
-    def get_model_for_role(role: AgentRole) -> str:
+    @classmethod
+    def get_model_for_role(cls, role: AgentRole) -> str:
         """Get the appropriate model for the role"""
-        config = AgentConfig.get_agent_config(role)
-        return config.get("model", "python")
+        return cls._MODEL_MAP.get(role, "python")
@@ -3,10 +3,202 @@ LLM Agent Executor
 Routes to Gemini or GPT-4o based on agent role
 """
 
-from typing import Dict, Any, Optional
-import google.generativeai as genai
-from openai import OpenAI
+import asyncio
+import functools
+import json
+import logging
+import random
+import re
+from typing import AsyncIterator, Dict, Any, List, Optional
+
+import msgspec
+import orjson
 from core import settings
+from .llm_cache import llm_cache
+
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def _get_genai():
+    """
+    Import and configure google-generativeai on first use. The SDK adds
+    hundreds of ms to serverless cold start, so requests that never touch
+    Gemini shouldn't pay for it at module import.
+    """
+    import google.generativeai as genai
+
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    return genai
+
+
+@functools.cache
+def _get_openai_client():
+    """
+    Import the OpenAI SDK on first use and share one async client.
+
+    The client rides on an HTTP/2 httpx transport so concurrent panelist
+    calls multiplex over a single connection instead of each grabbing a
+    fresh TCP/TLS handshake from an HTTP/1.1 pool.
+    """
+    import httpx
+    from openai import AsyncOpenAI
+
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+        # Bound every phase of the request so one slow provider call
+        # cannot hang a panel run indefinitely
+        timeout=httpx.Timeout(connect=3.0, read=30.0, write=10.0, pool=5.0),
+    )
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client)
+
+
+# Admission control: caps in-flight OpenAI requests process-wide so a
+# burst of panel runs queues client-side instead of tripping provider
+# rate limits and paying retry latency for every agent
+_OPENAI_SEMAPHORE = asyncio.Semaphore(16)
+
+_MAX_ATTEMPTS = 3
+
+# Extracts a fenced JSON body in a single pass instead of chained
+# str.split calls that copy the full response per split
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def extract_json_block(response: str) -> str:
+    """Return the JSON payload from a fenced LLM response, or the raw text"""
+    match = _JSON_FENCE_RE.search(response)
+    return match.group(1).strip() if match else response
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def parse_json_response(response: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the JSON body of an LLM response; None if no object is found.
+
+    Shared by every agent so there is one extraction path instead of
+    per-agent split ladders. When the fence regex misses (e.g. the model
+    wrapped the object in prose), raw_decode locates the first object in
+    a single pass without copying the response.
+    """
+    block = extract_json_block(response)
+    try:
+        return orjson.loads(block)
+    except orjson.JSONDecodeError:
+        start = block.find("{")
+        if start == -1:
+            return None
+        try:
+            obj, _ = _JSON_DECODER.raw_decode(block, start)
+            return obj if isinstance(obj, dict) else None
+        except ValueError:
+            return None
+
+
+# Static task bodies are assembled once at import time; per-call work
+# is reduced to a single f-string interpolation of the document text.
+# Every user message is DOCUMENT first, TASK last: back-to-back agent
+# calls on the same document then share a byte-identical prefix, so
+# server-side KV/prefix caches reuse the document portion and only the
+# short per-agent task suffix is new tokens.
+_GRAMMAR_TASK = """You are a strict academic grammar critic. Analyze the document for:
+1. Tense consistency (especially past passive in Chapter 3)
+2. Syntax errors
+3. Subject-verb agreement
+
+Return a JSON response with:
+- "errors": list of {type, location, suggestion}
+- "summary": brief summary
+- "severity": "major" or "minor" for each error
+"""
+
+_STATS_TASK = """You are a statistical methodology expert. Analyze the methodological text in the document.
+
+Verify:
+1. Data collection method aligns with claims
+2. Statistical test appropriateness
+3. Table formatting compliance
+
+Return JSON with:
+- "issues": list of {type, description, severity}
+- "summary": key findings
+"""
+
+
+def _format_user_message(document: str, task: str) -> str:
+    """Standard DOCUMENT-then-TASK layout shared by every panelist"""
+    return f"DOCUMENT:\n{document}\n\nTASK:\n{task}"
+
+
+# One shared excerpt bound keeps the document slice byte-identical
+# across all panelist agents, so server-side KV/prefix caches can reuse
+# the document portion between back-to-back agent calls. Sizing is the
+# chunkers' job (panel._MAX_SINGLE_CALL_CHARS and chunk_for_llm both
+# shard below this); the slice here is only a safety net for unchunked
+# callers, so it must not undercut the chunk size or sharded content
+# would be silently truncated before the request is built.
+_MAX_EXCERPT_CHARS = 24_000
+
+
+# Kept terse on purpose: shorter instructions plus enforced JSON output
+# cut both input and output tokens, and generation time scales with
+# output length
+_SUBJECT_SYSTEM_PROMPT = (
+    "You are an expert subject matter reviewer for academic thesis. "
+    "Analyze for coherence and logical flow. Respond in JSON: "
+    '{"issues": [{"type", "severity", "issue", "suggestion"}], "summary": ""}'
+)
+
+_CHAIRMAN_SYSTEM_PROMPT = (
+    "You are the Chairman synthesizing panel feedback. "
+    "Create a concise, actionable report."
+)
+
+# Combined panel prompt: one request carries all three panelist roles so
+# the document prefill is paid once instead of three times
+_COMBINED_SYSTEM_PROMPT = (
+    "You are a full academic thesis review panel acting as three reviewers at once: "
+    "a strict grammar critic (tense consistency, syntax, subject-verb agreement), "
+    "a statistical methodology expert (data collection, test appropriateness, "
+    "table formatting), and a subject matter reviewer (coherence, logical flow). "
+    "Respond in JSON with three keys: "
+    '{"grammar_issues": [...], "statistics_issues": [...], "content_issues": [...]}. '
+    "Each issue: {\"type\", \"severity\", \"issue\", \"suggestion\"}."
+)
+
+
+class GrammarError(msgspec.Struct):
+    """Single grammar issue as emitted by the Language Critic prompt"""
+    type: str = ""
+    location: str = ""
+    suggestion: str = ""
+    severity: str = ""
+
+
+class GrammarResult(msgspec.Struct):
+    """Fixed response schema the Language Critic reliably emits"""
+    errors: List[GrammarError] = []
+    summary: str = ""
+
+
+def parse_grammar_response(response: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a Language Critic response via msgspec's schema-specialized
+    decoder. The typed decoder skips per-field dict creation and hashing,
+    so well-formed responses parse several times faster than a generic
+    json.loads; malformed ones fall back to the generic parser.
+    """
+    try:
+        decoded = msgspec.json.decode(
+            extract_json_block(response).encode(),
+            type=GrammarResult,
+        )
+        return msgspec.to_builtins(decoded)
+    except (msgspec.DecodeError, msgspec.ValidationError):
+        return parse_json_response(response)
 
 
 class LLMAgentExecutor:
@@ -17,9 +209,56 @@ class LLMAgentExecutor:
         self.gemini_pro = settings.GEMINI_PRO_MODEL
         self.gpt4o = settings.OPENAI_MODEL
 
-        # Initialize clients
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # Initialize clients once; GenerativeModel construction re-parses
+        # model config, so the instances are pooled here instead of being
+        # rebuilt on every call
+        genai = _get_genai()
+        self._flash_model = genai.GenerativeModel(self.gemini_flash)
+        self._pro_model = genai.GenerativeModel(self.gemini_pro)
+        self.openai_client = _get_openai_client()
+
+        # System prompts are static per agent; hash them once so cache
+        # keys only need to hash the (variable) user content per call
+        self._subject_sys_hash = llm_cache.hash_content(_SUBJECT_SYSTEM_PROMPT)
+        self._chairman_sys_hash = llm_cache.hash_content(_CHAIRMAN_SYSTEM_PROMPT)
+        self._combined_sys_hash = llm_cache.hash_content(_COMBINED_SYSTEM_PROMPT)
+
+        # prompt_cache_key groups requests sharing a static prefix so the
+        # provider's prompt cache routes them to the same shard; cached
+        # prefix tokens are billed lower and skip prefill
+        self._subject_cache_key = self._subject_sys_hash[:32]
+        self._chairman_cache_key = self._chairman_sys_hash[:32]
+        self._combined_cache_key = self._combined_sys_hash[:32]
+
+    async def _chat_completion(self, **kwargs):
+        """
+        Admission-controlled chat completion with retry on transient
+        failures. Rate-limit and timeout errors back off exponentially
+        with jitter so concurrent agents don't retry in lockstep; other
+        errors propagate to the caller's own handling.
+        """
+        from openai import APITimeoutError, RateLimitError
+
+        async with _OPENAI_SEMAPHORE:
+            for attempt in range(_MAX_ATTEMPTS):
+                try:
+                    return await self.openai_client.chat.completions.create(**kwargs)
+                except (RateLimitError, APITimeoutError):
+                    if attempt == _MAX_ATTEMPTS - 1:
+                        raise
+                    await asyncio.sleep(min(2 ** attempt, 8) + random.random())
+
+    async def warmup(self) -> None:
+        """
+        Fire a cheap request at process start so the first panel run
+        reuses an established TCP/TLS connection instead of paying the
+        full handshake on the critical path. Failures are swallowed -
+        warmup is purely opportunistic.
+        """
+        try:
+            await self.openai_client.models.retrieve(self.gpt4o)
+        except Exception:
+            pass
 
     async def analyze_grammar(self, text: str) -> Dict[str, Any]:
         """
@@ -27,60 +266,187 @@ class LLMAgentExecutor:
         Per AGENTS.md: Fast and cost-efficient for syntax
         """
         try:
-            prompt = f"""You are a strict academic grammar critic. Analyze the following text for:
-1. Tense consistency (especially past passive in Chapter 3)
-2. Syntax errors
-3. Subject-verb agreement
+            prompt = _format_user_message(text[:_MAX_EXCERPT_CHARS], _GRAMMAR_TASK)
+            cache_key = llm_cache.make_key(self.gemini_flash, prompt)
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
 
-Text: {text[:2000]}  # Limit to 2000 chars
+            response = await self._flash_model.generate_content_async(prompt)
 
-Return a JSON response with:
-- "errors": list of {{type, location, suggestion}}
-- "summary": brief summary
-- "severity": "major" or "minor" for each error
-"""
-            model = genai.GenerativeModel(self.gemini_flash)
-            response = model.generate_content(prompt)
-            
-            return {
+            result = {
                 "agent": "language_critic",
                 "model": self.gemini_flash,
                 "response": response.text,
+                "parsed": parse_grammar_response(response.text),
             }
+            llm_cache.put(cache_key, result)
+            return result
         except Exception as e:
+            logger.exception("language_critic call failed")
             return {
                 "agent": "language_critic",
                 "error": str(e),
             }
 
+    async def _analyze_batch(
+        self,
+        analyze,
+        agent: str,
+        docs: List[str],
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fan one analyze method out over many documents under a semaphore.
+        Concurrent round-trips amortize total latency to roughly the
+        slowest single call instead of the sum; per-doc failures come
+        back as error dicts so one bad chunk doesn't sink the batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.MAX_LLM_CONCURRENCY)
+
+        async def bounded(doc: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await analyze(doc)
+
+        results = await asyncio.gather(
+            *(bounded(doc) for doc in docs),
+            return_exceptions=True,
+        )
+        return [
+            result if not isinstance(result, Exception)
+            else {"agent": agent, "error": str(result)}
+            for result in results
+        ]
+
+    async def analyze_grammar_batch(
+        self,
+        docs: List[str],
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Analyze multiple documents (e.g. thesis chapters) in one batch"""
+        return await self._analyze_batch(
+            self.analyze_grammar, "language_critic", docs, max_concurrency
+        )
+
+    async def analyze_statistics_batch(
+        self,
+        docs: List[str],
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Batched variant of analyze_statistics for chunked content"""
+        return await self._analyze_batch(
+            self.analyze_statistics, "statistician", docs, max_concurrency
+        )
+
+    async def analyze_subject_matter_batch(
+        self,
+        docs: List[str],
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Batched variant of analyze_subject_matter for chunked content"""
+        return await self._analyze_batch(
+            self.analyze_subject_matter, "subject_specialist", docs, max_concurrency
+        )
+
+    async def analyze_subject_matter_via_batch_api(
+        self,
+        docs: List[str],
+        poll_interval_s: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Offline variant of analyze_subject_matter_batch on the OpenAI
+        Batch API: all chunks go up as one JSONL file and come back as
+        one file when the batch completes. Requests are billed at the
+        batch discount and don't draw on interactive rate limits, at the
+        price of minutes of queueing - gate via USE_OPENAI_BATCH_API for
+        jobs where throughput and cost beat turnaround.
+        """
+        lines = []
+        for i, doc in enumerate(docs):
+            user_content = _format_user_message(
+                doc[:_MAX_EXCERPT_CHARS],
+                "Analyze this excerpt for coherence and logical flow.",
+            )
+            lines.append(orjson.dumps({
+                "custom_id": f"chunk-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.gpt4o,
+                    "messages": [
+                        {"role": "system", "content": _SUBJECT_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_content},
+                    ],
+                    "temperature": 0.7,
+                    "max_tokens": 400,
+                    "response_format": {"type": "json_object"},
+                },
+            }))
+
+        batch_file = await self.openai_client.files.create(
+            file=("panel_batch.jsonl", b"\n".join(lines)),
+            purpose="batch",
+        )
+        batch = await self.openai_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+
+        poll = poll_interval_s or settings.OPENAI_BATCH_POLL_S
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll)
+            batch = await self.openai_client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            logger.error("OpenAI batch %s ended as %s", batch.id, batch.status)
+            return [
+                {"agent": "subject_specialist", "error": f"batch {batch.status}"}
+                for _ in docs
+            ]
+
+        output = await self.openai_client.files.content(batch.output_file_id)
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for line in output.text.splitlines():
+            if not line:
+                continue
+            row = orjson.loads(line)
+            body = (row.get("response") or {}).get("body") or {}
+            choices = body.get("choices") or []
+            content = choices[0]["message"]["content"] if choices else ""
+            by_id[row["custom_id"]] = {
+                "agent": "subject_specialist",
+                "model": self.gpt4o,
+                "response": content,
+                "parsed": parse_json_response(content),
+            }
+        missing = {"agent": "subject_specialist", "error": "missing batch result"}
+        return [by_id.get(f"chunk-{i}", missing) for i in range(len(docs))]
+
     async def analyze_statistics(self, text: str) -> Dict[str, Any]:
         """
         Route to Gemini 1.5 Pro for statistical analysis
         Per AGENTS.md: Deep logical checks
         """
         try:
-            prompt = f"""You are a statistical methodology expert. Analyze the following methodological text:
+            prompt = _format_user_message(text[:_MAX_EXCERPT_CHARS], _STATS_TASK)
+            cache_key = llm_cache.make_key(self.gemini_pro, prompt)
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
 
-Text: {text[:2000]}
+            response = await self._pro_model.generate_content_async(prompt)
 
-Verify:
-1. Data collection method aligns with claims
-2. Statistical test appropriateness
-3. Table formatting compliance
-
-Return JSON with:
-- "issues": list of {{type, description, severity}}
-- "summary": key findings
-"""
-            model = genai.GenerativeModel(self.gemini_pro)
-            response = model.generate_content(prompt)
-            
-            return {
+            result = {
                 "agent": "statistician",
                 "model": self.gemini_pro,
                 "response": response.text,
+                "parsed": parse_json_response(response.text),
             }
+            llm_cache.put(cache_key, result)
+            return result
         except Exception as e:
+            logger.exception("statistician call failed")
             return {
                 "agent": "statistician",
                 "error": str(e),
@@ -92,33 +458,103 @@ Return JSON with:
         Per AGENTS.md: Deep logical checks with RAG
         """
         try:
-            response = self.openai_client.chat.completions.create(
+            user_content = _format_user_message(
+                text[:_MAX_EXCERPT_CHARS],
+                "Analyze this excerpt for coherence and logical flow.",
+            )
+            messages = [
+                {"role": "system", "content": _SUBJECT_SYSTEM_PROMPT},
+                {"role": "user", "content": user_content},
+            ]
+
+            cache_key = llm_cache.make_chat_key(
+                self.gpt4o, self._subject_sys_hash, user_content
+            )
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            response = await self._chat_completion(
                 model=self.gpt4o,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert subject matter reviewer for academic thesis. Analyze for coherence and logical flow.",
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Analyze this excerpt for coherence and logical flow:\n\n{text[:2000]}",
-                    },
-                ],
+                messages=messages,
                 temperature=0.7,
-                max_tokens=500,
+                max_tokens=400,
+                response_format={"type": "json_object"},
+                extra_body={"prompt_cache_key": self._subject_cache_key},
             )
-            
-            return {
+
+            content = response.choices[0].message.content
+            result = {
                 "agent": "subject_specialist",
                 "model": self.gpt4o,
-                "response": response.choices[0].message.content,
+                "response": content,
+                "parsed": parse_json_response(content),
             }
+            llm_cache.put(cache_key, result)
+            return result
         except Exception as e:
+            logger.exception("subject_specialist call failed")
             return {
                 "agent": "subject_specialist",
                 "error": str(e),
             }
 
+    async def analyze_combined(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Run all three panelist roles in a single LLM call.
+
+        Each panelist otherwise sends the same document body, paying the
+        prompt prefill three times; the combined call pays it once and
+        splits the tagged JSON sections back into per-agent results.
+        """
+        user_content = _format_user_message(
+            text[:_MAX_EXCERPT_CHARS],
+            "Review this excerpt as all three panelists.",
+        )
+        messages = [
+            {"role": "system", "content": _COMBINED_SYSTEM_PROMPT},
+            {"role": "user", "content": user_content},
+        ]
+
+        section_map = (
+            ("language_critic", "grammar_issues"),
+            ("statistician", "statistics_issues"),
+            ("subject_specialist", "content_issues"),
+        )
+
+        try:
+            cache_key = llm_cache.make_chat_key(
+                self.gpt4o, self._combined_sys_hash, user_content
+            )
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            response = await self._chat_completion(
+                model=self.gpt4o,
+                messages=messages,
+                temperature=0.5,
+                max_tokens=1200,
+                response_format={"type": "json_object"},
+                extra_body={"prompt_cache_key": self._combined_cache_key},
+            )
+
+            content = response.choices[0].message.content
+            parsed = parse_json_response(content) or {}
+            results = [
+                {
+                    "agent": agent,
+                    "model": self.gpt4o,
+                    "parsed": {"issues": parsed.get(section, [])},
+                }
+                for agent, section in section_map
+            ]
+            llm_cache.put(cache_key, results)
+            return results
+        except Exception as e:
+            logger.exception("combined panel call failed")
+            return [{"agent": agent, "error": str(e)} for agent, _ in section_map]
+
     async def synthesize_report(self, previous_results: list) -> Dict[str, Any]:
         """
         Synthesize all agent reports into a consolidated analysis
@@ -126,30 +562,89 @@ Return JSON with:
         """
         try:
             consolidated = "\n".join([str(r) for r in previous_results])
-            
-            response = self.openai_client.chat.completions.create(
+
+            user_content = f"Synthesize these findings:\n\n{consolidated}"
+            messages = [
+                {"role": "system", "content": _CHAIRMAN_SYSTEM_PROMPT},
+                {"role": "user", "content": user_content},
+            ]
+
+            cache_key = llm_cache.make_chat_key(
+                self.gpt4o, self._chairman_sys_hash, user_content
+            )
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            response = await self._chat_completion(
                 model=self.gpt4o,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are the Chairman synthesizing panel feedback. Create a concise, actionable report.",
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Synthesize these findings:\n\n{consolidated}",
-                    },
-                ],
+                messages=messages,
                 temperature=0.5,
                 max_tokens=1000,
+                extra_body={"prompt_cache_key": self._chairman_cache_key},
             )
-            
-            return {
+
+            result = {
                 "agent": "chairman",
                 "model": self.gpt4o,
                 "response": response.choices[0].message.content,
             }
+            llm_cache.put(cache_key, result)
+            return result
         except Exception as e:
+            logger.exception("chairman call failed")
             return {
                 "agent": "chairman",
                 "error": str(e),
             }
+
+    async def synthesize_report_stream(
+        self, previous_results: list
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of synthesize_report. Yields chairman report
+        deltas as they are generated so the UI can render progress at
+        time-to-first-token instead of waiting out the full completion.
+        """
+        consolidated = "\n".join([str(r) for r in previous_results])
+        messages = [
+            {"role": "system", "content": _CHAIRMAN_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Synthesize these findings:\n\n{consolidated}"},
+        ]
+        async for delta in self.stream_completion(messages):
+            yield delta
+
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.5,
+        max_tokens: int = 1000,
+    ) -> AsyncIterator[str]:
+        """
+        Stream completion deltas instead of buffering the full response.
+        Avoids holding a large response twice in memory and lets callers
+        start consuming (or forwarding to the UI) at time-to-first-token
+        rather than time-to-last-token.
+        """
+        stream = await self._chat_completion(
+            model=model or self.gpt4o,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+@functools.cache
+def get_executor() -> LLMAgentExecutor:
+    """
+    Process-wide shared executor. Constructing one per agent/request
+    would rebuild Gemini model objects and re-enter client setup; the
+    singleton keeps every caller on the same warm connection pools.
+    """
+    return LLMAgentExecutor()
@@ -0,0 +1,147 @@
+"""
+Panel Orchestration
+Runs all LLM panel agents concurrently instead of sequentially
+Per AGENTS.md: Role-Based Execution with Smart LLM Routing
+"""
+
+import asyncio
+import re
+from typing import Dict, Any, List, Optional
+
+from core import settings
+from .llm_executor import LLMAgentExecutor, get_executor
+
+# Chapter headings mark the natural shard boundaries for map-reduce
+# analysis of long documents
+_CHAPTER_SPLIT_RE = re.compile(r"\n\n(?=#{1,2} )")
+
+# Documents beyond this size are sharded instead of sent as one call.
+# ~24k chars is roughly a 6k-token input budget per chunk: prefill time
+# (and so TTFT) scales with prompt length, and chunks this size keep
+# per-call prefill short while letting the provider prefill chunks
+# concurrently.
+_MAX_SINGLE_CALL_CHARS = 24_000
+
+
+def _split_document(text: str, max_chars: int = _MAX_SINGLE_CALL_CHARS) -> List[str]:
+    """
+    Split a document into chunks below max_chars, preferring chapter
+    heading boundaries and falling back to fixed windows for oversized
+    chapters.
+    """
+    sections = _CHAPTER_SPLIT_RE.split(text)
+
+    chunks: List[str] = []
+    current = ""
+    for section in sections:
+        if current and len(current) + len(section) > max_chars:
+            chunks.append(current)
+            current = section
+        else:
+            current = f"{current}\n\n{section}" if current else section
+
+        # A single chapter longer than max_chars is windowed directly
+        while len(current) > max_chars:
+            chunks.append(current[:max_chars])
+            current = current[max_chars:]
+
+    if current:
+        chunks.append(current)
+    return chunks or [""]
+
+
+async def _run_agents(
+    executor: LLMAgentExecutor,
+    document_content: str,
+    semaphore: asyncio.Semaphore,
+) -> List[Dict[str, Any]]:
+    """Run the three panelist agents over one chunk inside a TaskGroup"""
+
+    async def bounded(coro):
+        async with semaphore:
+            async with asyncio.timeout(settings.AGENT_TIMEOUT_S):
+                return await coro
+
+    tasks = []
+    async with asyncio.TaskGroup() as tg:
+        tasks = [
+            tg.create_task(bounded(executor.analyze_grammar(document_content))),
+            tg.create_task(bounded(executor.analyze_statistics(document_content))),
+            tg.create_task(bounded(executor.analyze_subject_matter(document_content))),
+        ]
+    return [task.result() for task in tasks]
+
+
+async def _run_combined(
+    executor: LLMAgentExecutor,
+    document_content: str,
+    semaphore: asyncio.Semaphore,
+) -> List[Dict[str, Any]]:
+    """Run all three panelist roles as a single combined LLM call"""
+    async with semaphore:
+        async with asyncio.timeout(settings.AGENT_TIMEOUT_S):
+            return await executor.analyze_combined(document_content)
+
+
+async def run_panel(
+    document_content: str,
+    combined: bool = False,
+    chunks: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Run the full LLM panel over a document.
+
+    The agent calls are independent I/O-bound LLM round-trips, so they
+    fan out inside an asyncio.TaskGroup - total latency becomes the
+    slowest agent instead of the sum of all agents. A semaphore caps
+    in-flight LLM requests to stay under provider rate limits, and each
+    agent is bounded by AGENT_TIMEOUT_S so a hung provider call cancels
+    the remaining panelists instead of burning quota on results that
+    would be discarded.
+
+    Documents above the single-call threshold are map-reduced: sharded
+    on chapter boundaries, analyzed per shard concurrently, then
+    synthesized once - latency scales with the longest chapter instead
+    of the full thesis.
+
+    With combined=True the three panelists share one multi-task call per
+    chunk: the document tokens are prefilled once instead of three times,
+    trading per-role model routing for roughly a third of the token cost.
+
+    Callers that already sharded the document (e.g. the worker, which
+    chunks once and reuses the result across agent runs) pass chunks to
+    skip a second split of the same text.
+    """
+    executor = get_executor()
+    semaphore = asyncio.Semaphore(settings.MAX_LLM_CONCURRENCY)
+    if chunks is None:
+        chunks = _split_document(document_content)
+    run_chunk = _run_combined if combined else _run_agents
+
+    agent_results: List[Dict[str, Any]] = []
+    panel_error = None
+    try:
+        if len(chunks) == 1:
+            agent_results = await run_chunk(executor, chunks[0], semaphore)
+        else:
+            per_chunk = await asyncio.gather(
+                *(run_chunk(executor, chunk, semaphore) for chunk in chunks)
+            )
+            for chunk_results in per_chunk:
+                agent_results.extend(chunk_results)
+    except* Exception as eg:
+        panel_error = "; ".join(str(exc) for exc in eg.exceptions)
+
+    if panel_error is not None:
+        return {
+            "agents": agent_results,
+            "report": {"agent": "chairman", "error": f"Panel aborted: {panel_error}"},
+        }
+
+    # Chairman synthesizes after all panelists (and all chunks) complete
+    report = await executor.synthesize_report(agent_results)
+
+    return {
+        "agents": agent_results,
+        "report": report,
+    }
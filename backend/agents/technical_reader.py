@@ -3,9 +3,119 @@ Technical Reader Agent (Pure Python)
 Zero-Tolerance Format Checking per AGENTS.md: Golden Rules
 """
 
-from typing import Dict, List, Any
+import functools
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from docx import Document
-from docx.shared import Pt
+from docx.document import Document as DocumentObject
+from docx.oxml.ns import qn
+
+# qn() re-resolves the namespace prefix on every call; binding the
+# qualified names once at import leaves plain string compares in the
+# per-run extraction loop
+_W_R = qn("w:r")
+_W_RPR = qn("w:rPr")
+_W_RFONTS = qn("w:rFonts")
+_W_SZ = qn("w:sz")
+_W_B = qn("w:b")
+_W_I = qn("w:i")
+_W_ASCII = qn("w:ascii")
+_W_VAL = qn("w:val")
+_W_DOCDEFAULTS = qn("w:docDefaults")
+_W_RPRDEFAULT = qn("w:rPrDefault")
+
+# Tuple-driven rubric schema: (margin side, rubric key, default inches).
+# A single loop over this replaces per-call dict rebuilds and if-ladders.
+_MARGIN_TOLERANCE = 0.05  # inches
+
+_MARGIN_DEFS = (
+    ("left", "margin_left_inches", 1.5),
+    ("right", "margin_right_inches", 1.0),
+    ("top", "margin_top_inches", 1.0),
+    ("bottom", "margin_bottom_inches", 1.0),
+)
+
+# Severity aliases normalized to the two buckets the report exposes;
+# a dict lookup replaces per-item list membership tests
+_SEV_MAP = {
+    "major": "major",
+    "high": "major",
+    "critical": "major",
+    "minor": "minor",
+    "medium": "minor",
+    "low": "minor",
+}
+
+
+def dedupe_issues(issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop duplicate issues in one order-preserving pass.
+
+    Agents overlap (grammar, formatting and tech checks often flag the
+    same span), and duplicates both inflate the stored results payload
+    and cost repeated work downstream (e.g. re-highlighting the same
+    run). The key combines the issue type with its measured values and
+    truncated location/message text, so structurally identical findings
+    collapse while distinct ones survive.
+    """
+    seen = set()
+    deduped = []
+    for issue in issues:
+        key = (
+            issue.get("type"),
+            issue.get("margin"),
+            issue.get("required"),
+            issue.get("actual"),
+            ((issue.get("location") or {}).get("text") or "")[:64],
+            (issue.get("issue") or issue.get("message") or "")[:128],
+        )
+        if key not in seen:
+            seen.add(key)
+            deduped.append(issue)
+    return deduped
+
+
+def count_severities(issues: List[Dict[str, Any]]) -> Tuple[int, int, int]:
+    """
+    Tally (total, major, minor) over an issue list in one pass.
+    Severity aliases fold through _SEV_MAP, so callers merging issues
+    from several checks count once instead of re-scanning the list with
+    a comprehension per bucket.
+    """
+    severities = Counter(
+        _SEV_MAP.get((issue.get("severity") or "").lower())
+        for issue in issues
+    )
+    return len(issues), severities["major"], severities["minor"]
+
+
+@functools.lru_cache(maxsize=128)
+def _resolve_requirements(
+    rubric_key: Tuple,
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Resolve (margin, font) requirements from a hashable rubric key.
+    Batch pipelines construct one agent per document with the same
+    rubric; memoizing here skips re-resolving it every instantiation.
+    """
+    rubric = dict(rubric_key)
+    # Each margin is stored as (required, lo, hi): the tolerance interval
+    # is folded in here once, so the per-document check is two chained
+    # comparisons instead of a subtraction plus abs() per side
+    margins = {}
+    for side, key, default in _MARGIN_DEFS:
+        required = rubric.get(key, default)
+        margins[side] = (required, required - _MARGIN_TOLERANCE, required + _MARGIN_TOLERANCE)
+    fonts = {
+        "font_family": rubric.get("font_family", "Times New Roman"),
+        "font_size": rubric.get("font_size", 12),
+    }
+    paragraphs = {
+        "line_spacing": rubric.get("line_spacing", 2.0),
+    }
+    return margins, fonts, paragraphs
 
 
 class TechnicalReaderAgent:
@@ -14,20 +124,67 @@ class TechnicalReaderAgent:
     Does not use LLM - relies on exact measurements.
     """
 
-    def __init__(self, docx_path: str, rubric: Dict[str, Any]):
-        self.docx_path = docx_path
-        self.doc = Document(docx_path)
+    def __init__(self, source, rubric: Dict[str, Any]):
+        # source is a path, a file-like object (BytesIO or similar), or
+        # a Document a pipeline already parsed (shared with
+        # ChapterExtractor/SurgicalInjector to avoid re-parsing the same
+        # file per consumer)
+        self.docx_path = None
+        self._shared_doc: Optional[DocumentObject] = None
+        self._file_obj = None
+        if isinstance(source, DocumentObject):
+            self._shared_doc = source
+        elif source is None or isinstance(source, (str, os.PathLike)):
+            self.docx_path = source
+        else:
+            self._file_obj = source
         self.rubric = rubric
         self.errors: List[Dict[str, Any]] = []
 
+        # Resolve rubric requirements once per distinct rubric; repeated
+        # agents in a batch share the memoized result
+        rubric_key = tuple(
+            sorted(
+                (k, v)
+                for k, v in rubric.items()
+                if isinstance(v, (str, int, float, bool, type(None)))
+            )
+        )
+        (
+            self._margin_requirements,
+            self._font_requirements,
+            self._paragraph_requirements,
+        ) = _resolve_requirements(rubric_key)
+
+        # Structural summaries extracted lazily, once, so every check_*
+        # runs over a prebuilt list instead of re-walking the XML tree
+        self._run_props: Optional[
+            List[Tuple[Optional[str], Optional[float], bool, bool]]
+        ] = None
+        self._para_props: Optional[List[Optional[float]]] = None
+
+    @functools.cached_property
+    def doc(self) -> Optional[DocumentObject]:
+        """
+        Parse the docx on first access instead of in __init__. Callers
+        that never run a format check (LLM-only pipelines) skip the zip
+        extraction and full XML parse entirely; callers that hand in a
+        pre-parsed Document never parse here at all.
+        """
+        if self._shared_doc is not None:
+            return self._shared_doc
+        if self._file_obj is not None:
+            return Document(self._file_obj)
+        if self.docx_path and os.path.exists(self.docx_path):
+            return Document(self.docx_path)
+        return None
+
     def check_margins(self) -> Dict[str, Any]:
         """Check page margins against rubric"""
-        requirements = {
-            "left": self.rubric.get("margin_left_inches", 1.5),
-            "right": self.rubric.get("margin_right_inches", 1.0),
-            "top": self.rubric.get("margin_top_inches", 1.0),
-            "bottom": self.rubric.get("margin_bottom_inches", 1.0),
-        }
+        requirements = self._margin_requirements
+
+        if self.doc is None:
+            return {"success": False, "error": "Document not found"}
 
         if not self.doc.sections:
             return {"success": False, "error": "No sections found"}
@@ -40,13 +197,14 @@ class TechnicalReaderAgent:
         actual["bottom"] = section.bottom_margin.inches
 
         violations = []
-        for margin_type, required in requirements.items():
-            if abs(actual[margin_type] - required) > 0.05:  # 0.05 inch tolerance
+        for margin_type, (required, lo, hi) in requirements.items():
+            value = actual[margin_type]
+            if not lo <= value <= hi:
                 violations.append({
                     "type": "margin",
                     "margin": margin_type,
                     "required": required,
-                    "actual": round(actual[margin_type], 2),
+                    "actual": round(value, 2),
                     "severity": "major",
                 })
 
@@ -58,53 +216,222 @@ class TechnicalReaderAgent:
 
     def check_font_properties(self) -> Dict[str, Any]:
         """Check font family and size"""
-        requirements = {
-            "font_family": self.rubric.get("font_family", "Times New Roman"),
-            "font_size": self.rubric.get("font_size", 12),
-        }
+        requirements = self._font_requirements
+
+        if self.doc is None:
+            return {"success": False, "error": "Document not found"}
 
         violations = []
 
-        for para in self.doc.paragraphs:
-            for run in para.runs:
-                if run.font.name and run.font.name != requirements["font_family"]:
-                    violations.append({
-                        "type": "font_family",
-                        "required": requirements["font_family"],
-                        "actual": run.font.name,
-                        "severity": "major",
-                    })
-                    break  # Report once per paragraph
-
-                if run.font.size:
-                    actual_size = run.font.size.pt
-                    if actual_size != requirements["font_size"]:
-                        violations.append({
-                            "type": "font_size",
-                            "required": requirements["font_size"],
-                            "actual": actual_size,
-                            "severity": "minor",
-                        })
-                        break
+        # Most runs carry no explicit rPr override and inherit the
+        # document default from styles.xml; checking the default once
+        # covers all of them, and the per-run loop below only ever
+        # tests explicit overrides (inherited values come back None)
+        default_name, default_size = self._get_doc_default_font()
+        if default_name and default_name != requirements["font_family"]:
+            violations.append({
+                "type": "default_font_family",
+                "required": requirements["font_family"],
+                "actual": default_name,
+                "severity": "major",
+            })
+        if default_size is not None and default_size != requirements["font_size"]:
+            violations.append({
+                "type": "default_font_size",
+                "required": requirements["font_size"],
+                "actual": default_size,
+                "severity": "minor",
+            })
+
+        # Bind lookups once: the loop body otherwise re-resolves the
+        # bound append method and two dict keys per run
+        append = violations.append
+        required_family = requirements["font_family"]
+        required_size = requirements["font_size"]
+        for font_name, font_size, _bold, _italic in self._get_run_properties():
+            if font_name and font_name != required_family:
+                append({
+                    "type": "font_family",
+                    "required": required_family,
+                    "actual": font_name,
+                    "severity": "major",
+                })
+                continue
+
+            if font_size is not None and font_size != required_size:
+                append({
+                    "type": "font_size",
+                    "required": required_size,
+                    "actual": font_size,
+                    "severity": "minor",
+                })
+
+        return {
+            "success": len(violations) == 0,
+            "violations": violations[:5],  # Return first 5 violations
+        }
+
+    def _get_doc_default_font(self) -> Tuple[Optional[str], Optional[float]]:
+        """Read the document-default font from styles.xml docDefaults"""
+        defaults = self.doc.styles.element.find(_W_DOCDEFAULTS)
+        if defaults is None:
+            return None, None
+        rpr_default = defaults.find(_W_RPRDEFAULT)
+        if rpr_default is None:
+            return None, None
+        rpr = rpr_default.find(_W_RPR)
+        if rpr is None:
+            return None, None
+
+        name = None
+        size = None
+        rfonts = rpr.find(_W_RFONTS)
+        if rfonts is not None:
+            name = rfonts.get(_W_ASCII)
+        sz = rpr.find(_W_SZ)
+        if sz is not None:
+            val = sz.get(_W_VAL)
+            if val is not None:
+                size = float(val) / 2
+        return name, size
+
+    def _get_run_properties(
+        self,
+    ) -> List[Tuple[Optional[str], Optional[float], bool, bool]]:
+        """Materialize the per-run property list once and reuse it"""
+        if self._run_props is None:
+            self._run_props = list(self._iter_run_properties())
+        return self._run_props
+
+    def _iter_run_properties(
+        self,
+    ) -> Iterator[Tuple[Optional[str], Optional[float], bool, bool]]:
+        """
+        Yield (font_name, size_pt, bold, italic) per run via direct lxml
+        access.
+
+        python-docx resolves run.font.* through property descriptors that
+        re-walk the XML per attribute; pulling w:rFonts/@w:ascii,
+        w:sz/@w:val, w:b and w:i straight off the tree does the full
+        traversal once in C instead of four descriptor walks per run.
+        """
+        body = self.doc.element.body
+        for run_elem in body.iter(_W_R):
+            rpr = run_elem.find(_W_RPR)
+            font_name = None
+            font_size = None
+            bold = False
+            italic = False
+            if rpr is not None:
+                rfonts = rpr.find(_W_RFONTS)
+                if rfonts is not None:
+                    font_name = rfonts.get(_W_ASCII)
+                sz = rpr.find(_W_SZ)
+                if sz is not None:
+                    val = sz.get(_W_VAL)
+                    if val is not None:
+                        # w:sz stores half-points
+                        font_size = float(val) / 2
+                # Toggle properties: present means on unless w:val says off
+                b = rpr.find(_W_B)
+                if b is not None:
+                    bold = b.get(_W_VAL) not in ("0", "false")
+                i = rpr.find(_W_I)
+                if i is not None:
+                    italic = i.get(_W_VAL) not in ("0", "false")
+            yield font_name, font_size, bold, italic
+
+    def check_paragraph_formatting(self) -> Dict[str, Any]:
+        """Check paragraph line spacing against rubric"""
+        required = self._paragraph_requirements["line_spacing"]
+
+        if self.doc is None:
+            return {"success": False, "error": "Document not found"}
+
+        violations = []
+        append = violations.append
+        for spacing in self._get_paragraph_properties():
+            if spacing is not None and spacing != required:
+                append({
+                    "type": "line_spacing",
+                    "required": required,
+                    "actual": spacing,
+                    "severity": "minor",
+                })
 
         return {
             "success": len(violations) == 0,
             "violations": violations[:5],  # Return first 5 violations
         }
 
+    def check_image_properties(self) -> Dict[str, Any]:
+        """Check that inline images fit within the usable page width"""
+        if self.doc is None:
+            return {"success": False, "error": "Document not found"}
+
+        if not self.doc.sections:
+            return {"success": False, "error": "No sections found"}
+
+        section = self.doc.sections[0]
+        usable_width = (
+            section.page_width - section.left_margin - section.right_margin
+        )
+
+        violations = []
+        for shape in self.doc.inline_shapes:
+            if shape.width > usable_width:
+                violations.append({
+                    "type": "image_width",
+                    "required": round(usable_width / 914400, 2),  # EMU -> inches
+                    "actual": round(shape.width / 914400, 2),
+                    "severity": "major",
+                })
+
+        return {
+            "success": len(violations) == 0,
+            "violations": violations,
+        }
+
+    def _get_paragraph_properties(self) -> List[Optional[float]]:
+        """Materialize per-paragraph line spacing once and reuse it"""
+        if self._para_props is None:
+            props = []
+            for para in self.doc.paragraphs:
+                # Bind paragraph_format once; each access re-resolves the
+                # underlying w:pPr element through descriptors
+                para_fmt = para.paragraph_format
+                props.append(para_fmt.line_spacing)
+            self._para_props = props
+        return self._para_props
+
     def run_analysis(self) -> Dict[str, Any]:
         """Run full technical analysis"""
-        margin_check = self.check_margins()
-        font_check = self.check_font_properties()
+        # The four checks are read-only and independent, and lxml releases
+        # the GIL during tree work, so running them on threads brings wall
+        # time down toward the slowest single check
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = (
+                pool.submit(self.check_margins),
+                pool.submit(self.check_font_properties),
+                pool.submit(self.check_paragraph_formatting),
+                pool.submit(self.check_image_properties),
+            )
+            checks = tuple(future.result() for future in futures)
 
-        all_violations = margin_check.get("violations", []) + font_check.get("violations", [])
+        # Merge the four checks and drop duplicates on a stable key;
+        # repeated identical violations only inflate the report and any
+        # LLM prompt the list is forwarded into downstream
+        all_violations = dedupe_issues(
+            [v for check in checks for v in check.get("violations", [])]
+        )
 
-        major_errors = len([v for v in all_violations if v.get("severity") == "major"])
-        minor_errors = len([v for v in all_violations if v.get("severity") == "minor"])
+        # Single pass over the merged violations instead of one
+        # comprehension per severity bucket, with aliases folded in
+        _, major_errors, minor_errors = count_severities(all_violations)
 
         return {
             "agent": "technical_reader",
-            "success": margin_check.get("success") and font_check.get("success"),
+            "success": all(check.get("success") for check in checks),
             "major_errors": major_errors,
             "minor_errors": minor_errors,
             "violations": all_violations,
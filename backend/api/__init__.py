@@ -1,5 +1,23 @@
-"""API package - Flask Blueprints"""
-from .documents import documents_bp
-from .analysis import analysis_bp
+"""API package - route modules"""
 
-__all__ = ["documents_bp", "analysis_bp"]
+# PEP 562 lazy loading: the route modules pull in heavy transitive deps
+# (python-docx, supabase, celery), so neither is imported until its
+# router is first accessed instead of both loading serially at boot.
+_ROUTER_MODULES = {
+    "documents_router": "documents",
+    "analysis_router": "analysis",
+}
+
+__all__ = list(_ROUTER_MODULES)
+
+
+def __getattr__(name):
+    module_name = _ROUTER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+
+    router = import_module(f".{module_name}", __name__).router
+    globals()[name] = router  # cache so later accesses skip this hook
+    return router
@@ -3,26 +3,47 @@ FastAPI Routes for Analysis Execution
 Triggers Celery tasks and polls status
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel
 from typing import Dict, Any, Optional
 from celery.result import AsyncResult
 from agents import AgentRole, AgentConfig
 from agents.technical_reader import TechnicalReaderAgent
+from core.auth import get_current_user_id
+from core.supabase_client import get_supabase
 from document import ChapterExtractor
+import asyncio
+import os
 import uuid
 import json
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
-# This would be the Celery app in production
-# from worker import celery_app
+
+class StartAnalysisRequest(BaseModel):
+    """Payload for starting an analysis run. Validation happens in
+    pydantic-core (compiled), replacing hand-rolled per-field checks."""
+
+    file_id: str
+    agent_role: str
+
+
+def _parse_role(value: str) -> AgentRole:
+    """Map a raw role string to AgentRole or raise a 400.
+    One validator shared by every endpoint that accepts a role."""
+    try:
+        return AgentRole(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid agent role: {value}")
 
 
 @router.post("/start")
 async def start_analysis(
-    request: Dict[str, Any],
+    request: StartAnalysisRequest,
     background_tasks: BackgroundTasks,
+    user_id: str = Depends(get_current_user_id),
+    supabase=Depends(get_supabase),
 ) -> Dict[str, str]:
     """
     Start an analysis task for a given file and agent role.
@@ -31,28 +52,35 @@ async def start_analysis(
     Per AGENTS.md: FastAPI returns task_id immediately,
     Celery handles long document processing asynchronously.
     """
-    
-    file_id = request.get("file_id")
-    agent_role = request.get("agent_role")
-    
-    if not file_id or not agent_role:
-        raise HTTPException(status_code=400, detail="Missing file_id or agent_role")
-
-    # Validate agent role
-    try:
-        role = AgentRole(agent_role)
-    except ValueError:
-        raise HTTPException(status_code=400, detail=f"Invalid agent role: {agent_role}")
-
-    # Generate task ID
-    task_id = str(uuid.uuid4())
 
-    # In production, this would dispatch to Celery:
-    # task = celery_app.send_task(
-    #     "tasks.run_analysis",
-    #     args=[file_id, agent_role],
-    #     task_id=task_id,
-    # )
+    role = _parse_role(request.agent_role)
+
+    from worker import celery_app
+
+    # Generate task ID. .hex skips the hyphenated str() formatting pass;
+    # Celery task ids are opaque strings, so the compact form is fine
+    task_id = uuid.uuid4().hex
+
+    # Record the task row before dispatch so the worker's completion
+    # update (keyed on celery_task_id) has a row to match; upsert keeps
+    # re-runs of the same (file, role) on their existing row
+    supabase.table("analysis_tasks").upsert(
+        {
+            "owner_id": user_id,
+            "file_id": request.file_id,
+            "agent_role": request.agent_role,
+            "status": "queued",
+            "progress": 0,
+            "celery_task_id": task_id,
+        },
+        on_conflict="owner_id,file_id,agent_role",
+    ).execute()
+
+    celery_app.send_task(
+        "worker.run_analysis",
+        args=[request.file_id, request.agent_role],
+        task_id=task_id,
+    )
 
     return {
         "task_id": task_id,
@@ -66,18 +94,25 @@ async def get_analysis_status(task_id: str) -> Dict[str, Any]:
     """
     Poll the status of an analysis task.
     Returns progress, status, and results when complete.
+
+    Reads go straight to the Redis result backend via AsyncResult - a
+    sub-ms key lookup per poll, no database involved.
     """
-    
-    # In production, retrieve from Celery:
-    # task_result = AsyncResult(task_id, app=celery_app)
-    
-    # Mock response for demonstration
-    return {
+    from worker import celery_app
+
+    task_result = AsyncResult(task_id, app=celery_app)
+
+    response: Dict[str, Any] = {
         "task_id": task_id,
-        "status": "processing",
-        "progress": 45,
-        "message": "Executing surgical XML injection safely...",
+        "status": task_result.state.lower(),
     }
+    info = task_result.info
+    if isinstance(info, dict):
+        # PROGRESS meta from update_state, or the final result payload
+        response.update(info)
+    elif info is not None:
+        response["message"] = str(info)
+    return response
 
 
 @router.get("/download/{task_id}")
@@ -92,17 +127,50 @@ async def download_processed_file(task_id: str) -> FileResponse:
     
     # Mock file path
     file_path = f"/tmp/{task_id}_REVIEWED.docx"
-    
-    if not os.path.exists(file_path):
+
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Processed file not found")
 
+    # Passing stat_result spares Starlette a second stat; the ETag and
+    # Cache-Control let clients that re-poll the download get a 304
+    # instead of re-pulling the full docx
+    etag = f'"{int(st.st_mtime)}-{st.st_size:x}"'
     return FileResponse(
         file_path,
         filename=f"thesis_REVIEWED.docx",
         media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        stat_result=st,
+        headers={"ETag": etag, "Cache-Control": "private, max-age=300"},
     )
 
 
+@router.post("/stream-report")
+async def stream_report(
+    request: Dict[str, Any],
+    user_id: str = Depends(get_current_user_id),
+) -> StreamingResponse:
+    """
+    Stream the chairman synthesis as Server-Sent Events.
+    Tokens reach the client at time-to-first-token instead of after the
+    full completion has been buffered server-side. Auth-gated like every
+    other state-touching route: each call triggers a paid completion.
+    """
+    findings = request.get("findings", [])
+    if not findings:
+        raise HTTPException(status_code=400, detail="Missing findings to synthesize")
+
+    from agents.llm_executor import get_executor
+
+    async def event_stream():
+        async for delta in get_executor().synthesize_report_stream(findings):
+            yield f"data: {json.dumps(delta)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/manual-test")
 async def manual_test_analysis(
     request: Dict[str, Any],
@@ -113,19 +181,22 @@ async def manual_test_analysis(
     """
     
     file_path = request.get("file_path")
-    agent_role = request.get("agent_role", "tech")
+    role = _parse_role(request.get("agent_role", "tech"))
     rubric = request.get("rubric", {})
 
     try:
-        if agent_role == "tech":
-            # Test Technical Reader (Pure Python)
+        if role is AgentRole.TECHNICAL_READER:
+            # Test Technical Reader (Pure Python). run_analysis parses
+            # and walks the whole docx - tens of seconds for big theses -
+            # so it runs on a worker thread instead of blocking the event
+            # loop for every other in-flight request
             agent = TechnicalReaderAgent(file_path, rubric)
-            results = agent.run_analysis()
+            results = await asyncio.to_thread(agent.run_analysis)
         else:
             # Other agents would be tested similarly
             results = {
-                "agent": agent_role,
-                "message": f"Manual test for {agent_role} agent",
+                "agent": role.value,
+                "message": f"Manual test for {role.value} agent",
                 "status": "testing",
             }
 
@@ -139,6 +210,3 @@ async def manual_test_analysis(
             "success": False,
             "error": str(e),
         }
-
-
-import os
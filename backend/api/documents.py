@@ -5,24 +5,36 @@ Handles file upload and storage via Supabase
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import FileResponse
-from typing import List, Dict, Any
-from supabase import create_client
+from typing import List, Dict, Any, Optional
 from core import settings
+from core.auth import get_current_user_id
+from core.cache import TTLCache
+from core.supabase_client import get_supabase
 import uuid
 import os
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
+# Explicit column lists: select("*") drags every column (including wide
+# ones the UI never shows) through PostgREST and the JSON parser; the
+# list view needs only these
+LIST_COLS = "id,name,status,created_at,expired_at"
 
-def get_supabase():
-    """Get Supabase client"""
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+# Frozen at import for O(1) membership per upload; settings lists stay
+# configurable but aren't re-read per request
+_ALLOWED_EXTENSIONS = frozenset(ext.lower() for ext in settings.ALLOWED_EXTENSIONS)
+
+# Document metadata barely changes between upload and expiry, but the
+# UI polls it; cache-aside keyed on (owner, id) turns repeat GETs into
+# dict lookups. Deletes invalidate explicitly, and the short TTL covers
+# status flips written by the worker.
+_doc_cache = TTLCache(max_entries=2048, ttl_seconds=30)
 
 
 @router.post("/upload")
 async def upload_document(
     file: UploadFile = File(...),
-    user_id: str = "current_user",
+    user_id: str = Depends(get_current_user_id),
     supabase=Depends(get_supabase),
 ) -> Dict[str, Any]:
     """
@@ -36,20 +48,28 @@ async def upload_document(
     """
     
     # Validate file extension
-    if not file.filename.endswith(".docx"):
+    extension = file.filename.rsplit(".", 1)[-1].lower() if "." in file.filename else ""
+    if extension not in _ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
             detail="Strict Rule Violation: PDFs are dead documents. Upload a .docx file.",
         )
 
-    # Check file size (50MB limit)
+    # Check file size (50MB limit). Reading in chunks aborts an
+    # oversized upload at the limit instead of first buffering however
+    # many bytes the client cares to send
     max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
-    content = await file.read()
-    if len(content) > max_size:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File exceeds {settings.MAX_FILE_SIZE_MB}MB limit",
-        )
+    chunks = []
+    size = 0
+    while chunk := await file.read(64 * 1024):
+        size += len(chunk)
+        if size > max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File exceeds {settings.MAX_FILE_SIZE_MB}MB limit",
+            )
+        chunks.append(chunk)
+    content = b"".join(chunks)
 
     try:
         # Generate unique file ID
@@ -63,15 +83,16 @@ async def upload_document(
             {"cacheControl": "3600", "upsert": "false"},
         )
 
-        # Store metadata in PostgreSQL with RLS
+        # Store metadata in PostgreSQL with RLS. created_at/expired_at
+        # come from the column defaults (schema: NOW() / NOW() + 1 hour),
+        # which shrinks the payload and keeps the retention clock on the
+        # database's clock instead of each app server's
         doc_record = supabase.table("documents").insert({
             "id": file_id,
             "owner_id": user_id,
             "name": file.filename,
             "file_path": file_path,
             "status": "pending",
-            "created_at": "now()",
-            "expires_at": "now() + interval '1 hour'",  # Zero-retention policy
         }).execute()
 
         return {
@@ -87,13 +108,18 @@ async def upload_document(
 @router.get("/{file_id}")
 async def get_document(
     file_id: str,
-    user_id: str = "current_user",
+    user_id: str = Depends(get_current_user_id),
     supabase=Depends(get_supabase),
 ) -> Dict[str, Any]:
     """
     Retrieve document metadata.
     RLS ensures user can only access their own documents.
     """
+    cache_key = f"{user_id}:{file_id}"
+    cached = _doc_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         doc = (
             supabase.table("documents")
@@ -107,6 +133,7 @@ async def get_document(
         if not doc.data:
             raise HTTPException(status_code=404, detail="Document not found")
 
+        _doc_cache.put(cache_key, doc.data)
         return doc.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -114,22 +141,54 @@ async def get_document(
 
 @router.get("")
 async def list_documents(
-    user_id: str = "current_user",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    user_id: str = Depends(get_current_user_id),
     supabase=Depends(get_supabase),
-) -> List[Dict[str, Any]]:
+) -> Dict[str, Any]:
     """
-    List all documents owned by the user.
+    List documents owned by the user, newest first, paginated.
     RLS prevents access to other users' documents.
+
+    Keyset pagination on the indexed (created_at, id) pair: passing the
+    previous page's next_cursor costs O(log n) however deep the page,
+    where OFFSET would scan and discard every earlier row. The id
+    tie-break keeps rows sharing a timestamp from being skipped across
+    a page boundary.
     """
+    limit = max(1, min(limit, 200))
+
+    cursor_filter = None
+    if cursor:
+        try:
+            cursor_ts, cursor_id = cursor.rsplit(",", 1)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        cursor_filter = (
+            f'created_at.lt."{cursor_ts}",'
+            f'and(created_at.eq."{cursor_ts}",id.lt."{cursor_id}")'
+        )
+
     try:
-        docs = (
+        query = (
             supabase.table("documents")
-            .select("*")
+            .select(LIST_COLS)
             .eq("owner_id", user_id)
             .order("created_at", desc=True)
-            .execute()
+            .order("id", desc=True)
+            .limit(limit)
+        )
+        if cursor_filter:
+            query = query.or_(cursor_filter)
+        docs = query.execute()
+
+        rows = docs.data or []
+        next_cursor = (
+            f"{rows[-1]['created_at']},{rows[-1]['id']}"
+            if len(rows) == limit
+            else None
         )
-        return docs.data or []
+        return {"data": rows, "next_cursor": next_cursor}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -137,7 +196,7 @@ async def list_documents(
 @router.delete("/{file_id}")
 async def delete_document(
     file_id: str,
-    user_id: str = "current_user",
+    user_id: str = Depends(get_current_user_id),
     supabase=Depends(get_supabase),
 ) -> Dict[str, str]:
     """
@@ -145,24 +204,26 @@ async def delete_document(
     Per AGENTS.md: Zero-retention policy
     """
     try:
-        # Get document to verify ownership
-        doc = (
+        # Delete and fetch in one round-trip: PostgREST returns the
+        # deleted rows, so the ownership check, file_path lookup and row
+        # removal collapse into a single query instead of SELECT+DELETE
+        deleted = (
             supabase.table("documents")
-            .select("file_path")
+            .delete()
             .eq("id", file_id)
             .eq("owner_id", user_id)
-            .single()
             .execute()
         )
 
-        if not doc.data:
+        if not deleted.data:
             raise HTTPException(status_code=404, detail="Document not found")
 
-        # Delete from storage
-        supabase.storage.from_(settings.STORAGE_BUCKET_NAME).remove([doc.data["file_path"]])
+        _doc_cache.delete(f"{user_id}:{file_id}")
 
-        # Delete from database
-        supabase.table("documents").delete().eq("id", file_id).execute()
+        # Delete from storage
+        supabase.storage.from_(settings.STORAGE_BUCKET_NAME).remove(
+            [deleted.data[0]["file_path"]]
+        )
 
         return {"message": "Document deleted successfully"}
 
@@ -1,4 +1,9 @@
 """Core package"""
 from .config import settings
+from .logging_setup import setup_logging
+
+__all__ = ["settings", "setup_logging"]
+
+# auth and cache are imported directly (core.auth / core.cache) so the
+# package import stays light
 
-__all__ = ["settings"]
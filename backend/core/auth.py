@@ -0,0 +1,86 @@
+"""
+Auth Helpers
+Token-to-user resolution with cache-aside to avoid a network round-trip
+per request
+"""
+
+import hashlib
+from typing import Optional
+
+import jwt
+from fastapi import Header, HTTPException
+
+from .cache import TTLCache
+from .config import settings
+
+# Auth verdicts are keyed by token hash and live well under JWT expiry;
+# a hit turns a ~50-200ms supabase.auth.get_user round-trip into a dict
+# lookup. Process-local rather than Redis-backed: this service has no
+# Redis client dependency outside the Celery broker, and per-worker
+# caching is enough to collapse the per-request auth RTT.
+_token_cache = TTLCache(max_entries=4096, ttl_seconds=600)
+
+
+def _token_key(token: str) -> str:
+    return "auth:uid:" + hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_user_id_from_token(
+    token: str, supabase=None, strict: bool = False
+) -> Optional[str]:
+    """
+    Resolve a Supabase access token to its user id.
+
+    The token is a GoTrue-signed JWT, so signature and expiry verify
+    locally in microseconds with the project secret - no network call.
+    strict=True keeps the supabase.auth.get_user round-trip for flows
+    that must see revocation immediately; either path is fronted by the
+    token cache.
+    """
+    key = _token_key(token)
+    user_id = _token_cache.get(key)
+    if user_id is not None:
+        return user_id
+
+    if strict and supabase is not None:
+        user_id = supabase.auth.get_user(token).user.id
+    else:
+        try:
+            payload = jwt.decode(
+                token,
+                settings.SUPABASE_JWT_SECRET,
+                algorithms=["HS256"],
+                options={"verify_aud": False},
+            )
+        except jwt.PyJWTError:
+            return None
+        user_id = payload.get("sub")
+
+    if user_id:
+        _token_cache.put(key, user_id)
+    return user_id
+
+
+def invalidate_token(token: str) -> None:
+    """Drop a token's cached verdict (e.g. on logout)"""
+    _token_cache.delete(_token_key(token))
+
+
+def get_current_user_id(authorization: Optional[str] = Header(None)) -> str:
+    """
+    FastAPI dependency resolving the Authorization header to a user id.
+
+    Slices the token after a startswith check (O(1), no copy of the
+    header like str.replace) and rides the cached local JWT decode, so
+    per-request auth is a hash lookup in the common case. Raises 401 on
+    missing or invalid credentials.
+    """
+    token = (
+        authorization[7:]
+        if authorization and authorization.startswith("Bearer ")
+        else None
+    )
+    user_id = get_user_id_from_token(token) if token else None
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid or missing credentials")
+    return user_id
@@ -0,0 +1,52 @@
+"""
+Generic In-Memory TTL Cache
+Process-local cache-aside building block for hot lookups
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry TTL.
+
+    Same shape as the LLM response cache but value-agnostic, for short
+    hot lookups (auth results, document metadata) where a process-local
+    dict beats a network round-trip by orders of magnitude.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None on miss/expiry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Drop one entry if present"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        self._entries.clear()
@@ -19,6 +19,7 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_SERVICE_KEY: str
     SUPABASE_ANON_KEY: str
+    SUPABASE_JWT_SECRET: str = ""
     
     # OpenAI Configuration
     OPENAI_API_KEY: str
@@ -28,6 +29,22 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str
     GEMINI_FLASH_MODEL: str = "gemini-1.5-flash"
     GEMINI_PRO_MODEL: str = "gemini-1.5-pro"
+
+    # LLM Execution
+    MAX_LLM_CONCURRENCY: int = 5
+    AGENT_TIMEOUT_S: int = 120
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_S: int = 24 * 3600
+
+    # OpenAI Batch API: discounted offline processing for large
+    # multi-chunk jobs where turnaround in minutes is acceptable
+    USE_OPENAI_BATCH_API: bool = False
+    OPENAI_BATCH_POLL_S: int = 30
+
+    # Combined panel: one multi-task LLM call per chunk instead of three
+    # per-role calls - document prefill is paid once, trading per-role
+    # model routing for roughly a third of the token cost
+    USE_COMBINED_PANEL: bool = False
     
     # Redis & Celery Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -0,0 +1,44 @@
+"""
+Logging Setup
+Routes log records through a queue so handler I/O stays off the hot path
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+from .config import settings
+
+_listener = None
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """
+    Configure the root logger with a QueueHandler/QueueListener pair.
+
+    Emitting a record then only costs an enqueue; the stream flush - a
+    synchronous write that blocks the event loop or worker thread under
+    concurrency - happens on the listener's own thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG if settings.DEBUG else level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
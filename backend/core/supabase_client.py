@@ -0,0 +1,45 @@
+"""
+Shared Supabase Client
+One client per process instead of one per request
+"""
+
+import functools
+
+from .config import settings
+
+
+@functools.cache
+def get_supabase():
+    """
+    Process-wide Supabase client.
+
+    create_client builds fresh httpx sessions and PostgREST builders;
+    doing that per request pays TCP/TLS setup every time and defeats
+    keep-alive. The cached singleton keeps every caller on the same warm
+    connection pool, so each Supabase call rides an established HTTP
+    connection instead of a 30-100ms handshake.
+
+    Serverless note: on platforms that scale to many short-lived
+    instances, point SUPABASE_URL's database connection through
+    pgbouncer (``?pgbouncer=true&connection_limit=1``) so the per-
+    instance pools don't exhaust Postgres connections.
+    """
+    from supabase import create_client
+    from supabase.lib.client_options import ClientOptions
+
+    client = create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_SERVICE_KEY,
+        options=ClientOptions(
+            postgrest_client_timeout=10,
+            storage_client_timeout=30,
+        ),
+    )
+    # Pre-ping in the spirit of pool_pre_ping: touch the REST root once
+    # at init so the first real call reuses a verified-live connection.
+    # Purely opportunistic - failure just defers setup to first use.
+    try:
+        client.postgrest.session.get("/")
+    except Exception:
+        pass
+    return client
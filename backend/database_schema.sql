@@ -59,10 +59,28 @@ CREATE TABLE IF NOT EXISTS public.rubric_profiles (
   UNIQUE(owner_id, name)
 );
 
+-- Analysis result cache: results keyed by document content hash, agent
+-- role and rubric signature. Re-analyzing an unchanged document with
+-- the same role and rubric becomes a single SELECT instead of a full
+-- LLM panel run. Content-addressed, so rows carry no owner.
+CREATE TABLE IF NOT EXISTS public.analysis_cache (
+  doc_hash TEXT NOT NULL, -- sha256 of the original file bytes
+  agent_role TEXT NOT NULL,
+  profile_sig TEXT NOT NULL, -- hash of the rubric/profile used
+  results JSONB NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (doc_hash, agent_role, profile_sig)
+);
+
 -- Enable RLS on all tables
 ALTER TABLE public.documents ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.analysis_tasks ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.rubric_profiles ENABLE ROW LEVEL SECURITY;
+-- analysis_cache gets RLS with NO policies: cached results embed
+-- document excerpts and must not be readable or poisonable through the
+-- anon-key Data API. Only the worker's service-role client (which
+-- bypasses RLS) can read or write it.
+ALTER TABLE public.analysis_cache ENABLE ROW LEVEL SECURITY;
 
 -- RLS Policies for documents table
 CREATE POLICY "Users can only access their own documents"
@@ -126,14 +144,19 @@ CREATE POLICY "Users can delete their own rubric profiles"
   USING (auth.uid() = owner_id);
 
 -- Create indexes for performance
-CREATE INDEX idx_documents_owner_id ON public.documents(owner_id);
+-- Composite indexes match the hot query shapes: the document list
+-- filters on owner_id and orders by created_at DESC, task polling
+-- filters on (owner_id, file_id), and active-rubric lookup filters on
+-- (owner_id, is_active). Matching composites give index(-only) scans
+-- instead of heap lookups over single-column indexes.
+CREATE INDEX idx_documents_owner_created ON public.documents(owner_id, created_at DESC, id DESC);
 CREATE INDEX idx_documents_status ON public.documents(status);
-CREATE INDEX idx_documents_expired_at ON public.documents(expired_at);
-CREATE INDEX idx_analysis_tasks_owner_id ON public.analysis_tasks(owner_id);
-CREATE INDEX idx_analysis_tasks_file_id ON public.analysis_tasks(file_id);
+-- Partial: hourly cleanup only scans not-yet-deleted expired rows
+CREATE INDEX idx_documents_expired_at ON public.documents(expired_at)
+  WHERE deleted_at IS NULL;
+CREATE INDEX idx_analysis_tasks_owner_file ON public.analysis_tasks(owner_id, file_id);
 CREATE INDEX idx_analysis_tasks_status ON public.analysis_tasks(status);
-CREATE INDEX idx_rubric_profiles_owner_id ON public.rubric_profiles(owner_id);
-CREATE INDEX idx_rubric_profiles_is_active ON public.rubric_profiles(is_active);
+CREATE INDEX idx_rubric_profiles_owner_active ON public.rubric_profiles(owner_id, is_active);
 
 -- Storage bucket for DOCX files (create via Supabase dashboard and set RLS)
 -- Bucket name: thesis-drafts
@@ -1,5 +1,11 @@
 """Document processing package"""
 from .surgical_injector import SurgicalInjector, process_docx_with_highlights
-from .parser import ChapterExtractor
+from .parser import ChapterExtractor, extract_paragraph_texts, extract_text_from_docx
 
-__all__ = ["SurgicalInjector", "process_docx_with_highlights", "ChapterExtractor"]
+__all__ = [
+    "SurgicalInjector",
+    "process_docx_with_highlights",
+    "ChapterExtractor",
+    "extract_paragraph_texts",
+    "extract_text_from_docx",
+]
@@ -4,8 +4,66 @@ Extracts text and structure from DOCX files for LLM processing
 Implements smart chunking for large documents
 """
 
+import io
+import zipfile
+from itertools import islice
+
 from docx import Document
-from typing import List, Dict, Any, Tuple
+from docx.document import Document as DocumentObject
+from docx.oxml.ns import qn
+from lxml import etree
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+# Qualified names bound once at import; see technical_reader for the
+# same pattern
+_W_P = qn("w:p")
+_W_T = qn("w:t")
+_W_BODY = qn("w:body")
+
+
+def extract_paragraph_texts(source: Union[str, bytes, io.IOBase]) -> List[str]:
+    """
+    One iterparse pass yielding paragraph texts indexed by ordinal.
+
+    The list doubles as a paragraph_index -> text lookup (``texts[i] if
+    i < len(texts) else ""``): positional indexing replaces the dict a
+    second full pass over the document used to build, with no hashed
+    integer keys duplicating what the list order already encodes. Only
+    body-level paragraphs count, so the ordinals line up with
+    doc.paragraphs (and the injector's indexing); paragraphs nested in
+    table cells are skipped, not enumerated.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    paragraphs: List[str] = []
+    with zipfile.ZipFile(source) as archive:
+        with archive.open("word/document.xml") as xml_stream:
+            for _, el in etree.iterparse(xml_stream, tag=_W_P):
+                parent = el.getparent()
+                if parent is None or parent.tag != _W_BODY:
+                    continue
+                paragraphs.append("".join(t.text or "" for t in el.iter(_W_T)))
+                # Drop the consumed subtree and the siblings already
+                # passed (including tables) so the tree never grows past
+                # one body element
+                el.clear()
+                while el.getprevious() is not None:
+                    del parent[0]
+    return paragraphs
+
+
+def extract_text_from_docx(source: Union[str, bytes, io.IOBase]) -> str:
+    """
+    Pull plain text straight out of a DOCX without building a Document.
+
+    A .docx is a zip whose word/document.xml holds all run text; reading
+    it with iterparse and clearing each w:p after harvesting its w:t
+    descendants keeps memory flat at one paragraph regardless of
+    document size, and skips python-docx's styles/relationships/numbering
+    parsing entirely. Accepts a path, raw bytes, or a file-like object.
+    """
+    return "\n".join(extract_paragraph_texts(source))
 
 
 class ChapterExtractor:
@@ -14,8 +72,13 @@ class ChapterExtractor:
     Implements smart chunking per AGENTS.md: Large documents split by chapters
     """
 
-    def __init__(self, docx_path: str):
-        self.doc = Document(docx_path)
+    def __init__(self, source: Union[str, io.IOBase, DocumentObject]):
+        # Accepting a pre-parsed Document lets pipelines that also run
+        # the technical reader or injector share one parse instead of
+        # unzipping and re-parsing the same file per consumer. File-like
+        # sources (BytesIO, SpooledTemporaryFile) parse in place - no
+        # write-to-disk round-trip for bytes already in memory.
+        self.doc = source if isinstance(source, DocumentObject) else Document(source)
         self.chapters: List[Dict[str, Any]] = []
 
     def extract_chapters(self) -> List[Dict[str, Any]]:
@@ -27,18 +90,21 @@ class ChapterExtractor:
         chapters = []
 
         for para in self.doc.paragraphs:
+            # para.text and para.style resolve through descriptors that
+            # re-walk the XML; read each once per paragraph
+            text = para.text
             if para.style.name.startswith("Heading 1"):
                 # New chapter
                 if current_chapter:
                     chapters.append(current_chapter)
 
                 current_chapter = {
-                    "title": para.text,
+                    "title": text,
                     "paragraphs": [],
                     "tables": [],
                 }
             elif current_chapter:
-                current_chapter["paragraphs"].append(para.text)
+                current_chapter["paragraphs"].append(text)
 
         # Add last chapter
         if current_chapter:
@@ -49,7 +115,16 @@ class ChapterExtractor:
 
     def extract_full_text(self) -> str:
         """Extract all text content from document"""
-        return "\n".join([para.text for para in self.doc.paragraphs])
+        # doc.paragraphs materializes a wrapper object per paragraph just
+        # to read .text; iterating w:p/w:t on the lxml tree feeds join a
+        # generator with no intermediate Paragraph allocations. Direct
+        # children only - iter() would also pull paragraphs nested in
+        # table cells, which doc.paragraphs never returned
+        body = self.doc.element.body
+        return "\n".join(
+            "".join(t.text or "" for t in p_elem.iter(_W_T))
+            for p_elem in body.iterchildren(_W_P)
+        )
 
     def extract_tables(self) -> List[List[List[str]]]:
         """Extract all tables from document"""
@@ -62,33 +137,49 @@ class ChapterExtractor:
             tables.append(table_data)
         return tables
 
-    def chunk_for_llm(self, max_tokens: int = 4000) -> List[Dict[str, Any]]:
+    def iter_chunks_for_llm(self, max_tokens: int = 4000) -> Iterator[Dict[str, Any]]:
         """
-        Split document into chunks suitable for LLM processing.
-        Respects chapter boundaries when possible.
+        Yield LLM-sized chunks lazily.
+
+        Each chunk materializes only when the caller asks for it, so a
+        consumer that caps its intake (islice, or chunk_for_llm's
+        max_chunks) stops tokenizing the moment it has enough - the
+        tail of a 300-chunk document is never split or joined.
         """
-        chunks = []
-        current_chunk = ""
+        current: List[str] = []
         current_token_count = 0
 
         # Rough estimate: 1 word ≈ 1.3 tokens
         TOKEN_PER_WORD = 1.3
 
         for para in self.doc.paragraphs:
-            para_tokens = int(len(para.text.split()) * TOKEN_PER_WORD)
+            text = para.text
+            para_tokens = int(len(text.split()) * TOKEN_PER_WORD)
 
-            if current_token_count + para_tokens > max_tokens and current_chunk:
-                chunks.append({"text": current_chunk, "token_estimate": current_token_count})
-                current_chunk = ""
+            if current_token_count + para_tokens > max_tokens and current:
+                yield {"text": "".join(current), "token_estimate": current_token_count}
+                current = []
                 current_token_count = 0
 
-            current_chunk += para.text + "\n"
+            current.append(text + "\n")
             current_token_count += para_tokens
 
-        if current_chunk:
-            chunks.append({"text": current_chunk, "token_estimate": current_token_count})
+        if current:
+            yield {"text": "".join(current), "token_estimate": current_token_count}
 
-        return chunks
+    def chunk_for_llm(
+        self, max_tokens: int = 4000, max_chunks: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Split document into chunks suitable for LLM processing.
+        Respects chapter boundaries when possible. max_chunks caps the
+        list and short-circuits the underlying pass instead of building
+        chunks only to slice them away.
+        """
+        chunks = self.iter_chunks_for_llm(max_tokens)
+        if max_chunks is not None:
+            chunks = islice(chunks, max_chunks)
+        return list(chunks)
 
     def get_document_metadata(self) -> Dict[str, Any]:
         """Extract document metadata"""
@@ -4,16 +4,20 @@ Implements non-destructive XML-based editing for DOCX files
 Following AGENTS.md: Golden Rules for Document Processing
 """
 
+import logging
 import os
 import shutil
 from pathlib import Path
 from docx import Document
+from docx.document import Document as DocumentObject
 from docx.oxml import parse_xml
 from docx.oxml.ns import nsdecls
 from docx.enum.text import WD_COLOR_INDEX
 from docx.shared import Pt, RGBColor
 from typing import Optional, List, Dict, Any
 
+logger = logging.getLogger(__name__)
+
 
 class SurgicalInjector:
     """
@@ -22,21 +26,35 @@ class SurgicalInjector:
     CRITICAL: Apply highlights directly to run objects to preserve styles.
     """
 
-    def __init__(self, docx_path: str):
+    def __init__(self, source):
         """
-        Initialize with DOCX file path.
-        Automatically creates a backup copy.
+        Initialize with a DOCX file path, a file-like object (BytesIO,
+        SpooledTemporaryFile), or a pre-parsed Document. Passing the
+        Document a pipeline already parsed (e.g. one shared with
+        ChapterExtractor) skips a second unzip-and-parse of the same
+        file; file-like inputs parse in place without a write-to-disk
+        round-trip. Only path inputs get a backup copy - the others
+        have no on-disk original to back up.
         """
-        self.original_path = docx_path
-        self.doc_path = docx_path
-        self.doc = Document(docx_path)
-        self._create_backup()
+        if isinstance(source, DocumentObject):
+            self.original_path = None
+            self.doc_path = None
+            self.doc = source
+        elif isinstance(source, (str, os.PathLike)):
+            self.original_path = source
+            self.doc_path = source
+            self.doc = Document(source)
+            self._create_backup()
+        else:
+            self.original_path = None
+            self.doc_path = None
+            self.doc = Document(source)
 
     def _create_backup(self):
         """Create a backup of the original file before processing"""
         backup_path = self.original_path.replace(".docx", "_backup.docx")
         shutil.copy2(self.original_path, backup_path)
-        print(f"Backup created at: {backup_path}")
+        logger.debug("Backup created at: %s", backup_path)
 
     def read_page_margins(self) -> Dict[str, float]:
         """
@@ -100,7 +118,7 @@ class SurgicalInjector:
             return True
 
         except Exception as e:
-            print(f"Error injecting highlight: {e}")
+            logger.error("Error injecting highlight: %s", e)
             return False
 
     def inject_comment(self, paragraph_index: int, comment_text: str, author: str = "PanelZero") -> bool:
@@ -121,7 +139,7 @@ class SurgicalInjector:
             return True
 
         except Exception as e:
-            print(f"Error injecting comment: {e}")
+            logger.error("Error injecting comment: %s", e)
             return False
 
     def save_processed_file(self, output_path: str) -> bool:
@@ -131,10 +149,10 @@ class SurgicalInjector:
         """
         try:
             self.doc.save(output_path)
-            print(f"Processed document saved to: {output_path}")
+            logger.debug("Processed document saved to: %s", output_path)
             return True
         except Exception as e:
-            print(f"Error saving processed file: {e}")
+            logger.error("Error saving processed file: %s", e)
             return False
 
     def verify_docx_integrity(self) -> bool:
@@ -143,11 +161,12 @@ class SurgicalInjector:
         Used for validation before and after processing.
         """
         try:
-            # Try to load the document to verify integrity
-            test_doc = Document(self.doc_path)
+            # Try to load the document to verify integrity; with no
+            # backing file, check the in-memory tree instead
+            test_doc = Document(self.doc_path) if self.doc_path else self.doc
             return len(test_doc.paragraphs) > 0
         except Exception as e:
-            print(f"DOCX integrity check failed: {e}")
+            logger.error("DOCX integrity check failed: %s", e)
             return False
 
 
@@ -178,9 +197,21 @@ def process_docx_with_highlights(
         margins = injector.read_page_margins()
         fonts = injector.read_font_properties()
 
+        # Dedupe highlight specs before touching the document: agents
+        # overlap on the same spans, and injecting each duplicate walks
+        # doc.paragraphs again for a highlight already applied
+        unique_highlights = {
+            (
+                h.get("paragraph_index", 0),
+                h.get("run_index", 0),
+                h.get("text_match", ""),
+            ): h
+            for h in highlights
+        }.values()
+
         # Apply highlights
         successful_highlights = 0
-        for highlight in highlights:
+        for highlight in unique_highlights:
             if injector.inject_yellow_highlight(
                 highlight.get("paragraph_index", 0),
                 highlight.get("run_index", 0),
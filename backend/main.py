@@ -1,75 +1,100 @@
 """
-Flask Application Entry Point for PanelZero
+FastAPI Application Entry Point for PanelZero
 Configures routes, middleware, and startup logic
 Vercel-ready serverless backend
 """
 
-from flask import Flask, jsonify
-from flask_cors import CORS
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from core import setup_logging
 from core.config import settings
-from api.documents import documents_bp
-from api.analysis import analysis_bp
+from api import analysis_router, documents_router
+
+# Queue-based logging keeps handler I/O off request threads
+setup_logging()
+
+# ORJSONResponse serializes every response through Rust instead of
+# stdlib json
+app = FastAPI(
+    title=settings.API_TITLE,
+    version=settings.API_VERSION,
+    default_response_class=ORJSONResponse,
+)
 
-app = Flask(__name__)
+
+@app.on_event("startup")
+async def _warmup_llm_connections():
+    """
+    Establish LLM provider connections off the request path. This must
+    run on the serving loop: httpx pools its connections per event loop,
+    so warming in a side loop would leave the pool holding a connection
+    no request loop can reuse. Scheduled as a background task so boot
+    isn't blocked; warmup itself swallows failures.
+    """
+    from agents.llm_executor import get_executor
+
+    asyncio.create_task(get_executor().warmup())
 
 # CORS Configuration - Allow all origins for Vercel
-CORS(
-    app,
-    origins="*",
-    supports_credentials=True,
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
     allow_headers=["Content-Type", "Authorization"],
-    methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
 )
 
-# Register blueprints
-app.register_blueprint(documents_bp)
-app.register_blueprint(analysis_bp)
+# Register routers
+app.include_router(documents_router, prefix="/api/v1")
+app.include_router(analysis_router, prefix="/api/v1")
 
 
-@app.route("/api/health", methods=["GET"])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "api": settings.API_TITLE,
-        "version": settings.API_VERSION,
-    })
+# These payloads never change at runtime; building the dicts once at
+# import leaves only serialization per request
+_HEALTH_RESPONSE = {
+    "status": "healthy",
+    "api": settings.API_TITLE,
+    "version": settings.API_VERSION,
+}
 
+_ROOT_RESPONSE = {
+    "message": "PanelZero API",
+    "health": "/api/health",
+    "docs": "/api/docs",
+}
 
-@app.route("/", methods=["GET"])
-def root():
-    """Root endpoint"""
-    return jsonify({
-        "message": "PanelZero API",
-        "health": "/api/health",
-        "docs": "/api/docs",
-    })
+_DOCS_RESPONSE = {
+    "endpoints": {
+        "health": "GET /api/health",
+        "documents": "POST /api/v1/documents/upload",
+        "analysis": "POST /api/v1/analysis/start",
+    },
+}
 
 
-@app.route("/api/docs", methods=["GET"])
-def docs():
-    """API Documentation endpoint"""
-    return jsonify({
-        "endpoints": {
-            "health": "GET /api/health",
-            "documents": "POST /api/v1/documents/upload",
-            "analysis": "POST /api/v1/analysis/start",
-        },
-    })
+@app.get("/api/health")
+async def health_check():
+    """Health check endpoint"""
+    return _HEALTH_RESPONSE
 
 
-@app.errorhandler(404)
-def not_found(error):
-    """Handle 404 errors"""
-    return jsonify({"error": "Not found"}), 404
+@app.get("/")
+async def root():
+    """Root endpoint"""
+    return _ROOT_RESPONSE
 
 
-@app.errorhandler(500)
-def server_error(error):
-    """Handle 500 errors"""
-    return jsonify({"error": "Internal server error"}), 500
+@app.get("/api/docs")
+async def docs():
+    """API Documentation endpoint"""
+    return _DOCS_RESPONSE
 
 
 if __name__ == "__main__":
     # Local development only
-    app.run(debug=settings.DEBUG, host="0.0.0.0", port=8000)
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8000)
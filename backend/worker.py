@@ -4,6 +4,12 @@ Handles async task processing for long-running document analysis
 Per AGENTS.md: Celery with Redis broker for task queuing
 """
 
+import asyncio
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 from celery import Celery
 from core import settings
 
@@ -26,6 +32,115 @@ celery_app.conf.update(
 )
 
 
+async def _run_llm_analysis(agent_role: str, extractor) -> dict:
+    """
+    Run the LLM panel for one task.
+
+    Every LLM role goes through panel.run_panel, so the production path
+    gets the orchestrator's TaskGroup fan-out, per-agent timeouts,
+    chapter-boundary sharding and chairman synthesis instead of a
+    divergent worker-only pipeline. The opt-in Batch API path remains
+    for large subject-matter jobs where offline pricing beats
+    turnaround - a Celery task already tolerates minutes of latency.
+    """
+    from agents.panel import run_panel
+
+    if agent_role == "subject" and settings.USE_OPENAI_BATCH_API:
+        from agents.llm_executor import get_executor
+
+        chunks = extractor.chunk_for_llm()
+        if len(chunks) > 1:
+            chunk_results = await get_executor().analyze_subject_matter_via_batch_api(
+                [chunk["text"] for chunk in chunks]
+            )
+            return {"agent": agent_role, "chunks": chunk_results}
+
+    return await run_panel(
+        extractor.extract_full_text(),
+        combined=settings.USE_COMBINED_PANEL,
+    )
+
+
+# One event loop per worker process, reused across tasks. The cached
+# executor's httpx pool, Gemini async client and module-level semaphore
+# all bind to the loop they first run on; asyncio.run's throwaway loop
+# would leave them bound to a closed loop from the second task onward
+# ("Event loop is closed" / "bound to a different event loop").
+_loop = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+
+def _profile_signature(profile: dict) -> str:
+    """Stable short hash of a rubric/profile dict for cache keying"""
+    payload = orjson.dumps(profile or {}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def _cached_results(supabase, doc_hash: str, agent_role: str, profile_sig: str):
+    """
+    Look up a prior run of the same bytes + role + rubric. The cache is
+    content-addressed, so an unchanged re-submission costs one SELECT
+    instead of a full agent run; lookup failures just mean a cache miss.
+    """
+    try:
+        row = (
+            supabase.table("analysis_cache")
+            .select("results")
+            .eq("doc_hash", doc_hash)
+            .eq("agent_role", agent_role)
+            .eq("profile_sig", profile_sig)
+            .limit(1)
+            .execute()
+        )
+        return row.data[0]["results"] if row.data else None
+    except Exception:
+        return None
+
+
+def _result_has_errors(results) -> bool:
+    """
+    True when a result payload carries any error entry. The analyze_*
+    methods swallow provider failures into {"agent", "error"} dicts and
+    run_panel degrades to a "Panel aborted" report instead of raising,
+    so an all-failed run still looks like a normal dict - caching it
+    would pin the failure to this (doc, role, rubric) forever, since
+    analysis_cache rows never expire.
+    """
+    if not isinstance(results, dict):
+        return True
+    if "error" in results or results.get("success") is False:
+        return True
+    report = results.get("report")
+    if isinstance(report, dict) and "error" in report:
+        return True
+    for finding in results.get("agents", []):
+        if isinstance(finding, dict) and "error" in finding:
+            return True
+    for chunk in results.get("chunks", []):
+        if isinstance(chunk, dict) and "error" in chunk:
+            return True
+    return False
+
+
+def _store_results(supabase, doc_hash: str, agent_role: str, profile_sig: str, results):
+    """Best-effort cache insert; a write failure never fails the task"""
+    try:
+        supabase.table("analysis_cache").upsert({
+            "doc_hash": doc_hash,
+            "agent_role": agent_role,
+            "profile_sig": profile_sig,
+            "results": results,
+        }).execute()
+    except Exception:
+        pass
+
+
 # Task definitions
 @celery_app.task(bind=True)
 def run_analysis(self, file_id: str, agent_role: str) -> dict:
@@ -33,6 +148,8 @@ def run_analysis(self, file_id: str, agent_role: str) -> dict:
     Main analysis task executed by Celery worker.
     Updates task state for progress tracking.
     """
+    from core.supabase_client import get_supabase
+
     try:
         self.update_state(
             state="PROGRESS",
@@ -40,40 +157,80 @@ def run_analysis(self, file_id: str, agent_role: str) -> dict:
         )
 
         # Step 1: Download file from Supabase
-        # supabase_client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
-        # file_data = supabase_client.storage.from_('thesis-drafts').download(file_path)
+        supabase = get_supabase()
+        doc = (
+            supabase.table("documents")
+            .select("file_path")
+            .eq("id", file_id)
+            .single()
+            .execute()
+        )
+        file_data = supabase.storage.from_(settings.STORAGE_BUCKET_NAME).download(
+            doc.data["file_path"]
+        )
 
         self.update_state(
             state="PROGRESS",
             meta={"current": 50, "total": 100, "status": "Running analysis..."},
         )
 
-        # Step 2: Execute appropriate agent
-        if agent_role == "tech":
-            # from agents.technical_reader import TechnicalReaderAgent
-            # agent = TechnicalReaderAgent(file_path, {})
-            # results = agent.run_analysis()
-            results = {"agent": "technical_reader", "status": "complete"}
-        else:
-            results = {"agent": agent_role, "status": "complete"}
+        # Same bytes + role + rubric analyzed before? Serve the stored
+        # results instead of re-running the agents
+        rubric: dict = {}
+        doc_hash = hashlib.sha256(file_data).hexdigest()
+        profile_sig = _profile_signature(rubric)
+        results = _cached_results(supabase, doc_hash, agent_role, profile_sig)
+
+        if results is None:
+            # Step 2: Execute appropriate agent (instantiated once per
+            # task, not per chunk). The downloaded bytes parse straight
+            # from memory - no temp-file write/read/unlink round-trip
+            buffer = io.BytesIO(file_data)
+            if agent_role == "tech":
+                from agents.technical_reader import TechnicalReaderAgent
+
+                agent = TechnicalReaderAgent(buffer, rubric)
+                results = agent.run_analysis()
+            else:
+                from document import ChapterExtractor
+
+                results = _get_loop().run_until_complete(
+                    _run_llm_analysis(agent_role, ChapterExtractor(buffer))
+                )
+
+            # Only clean runs are cached: a stored failure would be
+            # served instead of retried on every later submission
+            if not _result_has_errors(results):
+                _store_results(supabase, doc_hash, agent_role, profile_sig, results)
 
         self.update_state(
             state="PROGRESS",
             meta={"current": 75, "total": 100, "status": "Processing results..."},
         )
 
-        # Step 3: Inject highlights into DOCX
-        # from document import SurgicalInjector
-        # injector = SurgicalInjector(file_path)
-        # injector.save_processed_file(output_path)
+        # Step 3: Persist outcomes. The document-status update and the
+        # task-row update hit independent tables, so both round-trips
+        # run concurrently on threads and the step costs the slower one
+        # instead of their sum
+        doc_update = {"status": "analyzed"}
+        if isinstance(results, dict) and "major_errors" in results:
+            doc_update["major_errors"] = results["major_errors"]
+            doc_update["minor_errors"] = results["minor_errors"]
 
-        self.update_state(
-            state="PROGRESS",
-            meta={"current": 90, "total": 100, "status": "Uploading processed file..."},
-        )
+        def update_document():
+            supabase.table("documents").update(doc_update).eq("id", file_id).execute()
 
-        # Step 4: Upload processed file to Supabase
-        # supabase_client.storage.from_('thesis-drafts').upload(...)
+        def update_task():
+            supabase.table("analysis_tasks").update({
+                "status": "complete",
+                "progress": 100,
+                "results": results,
+                "completed_at": "now()",
+            }).eq("celery_task_id", self.request.id).execute()
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for future in [pool.submit(update_document), pool.submit(update_task)]:
+                future.result()
 
         return {
             "task_id": self.request.id,
@@ -97,17 +254,25 @@ def cleanup_expired_files():
     Scheduled task to delete expired files from Supabase.
     Per AGENTS.md: Zero-retention policy - delete files hourly.
     """
-    # from supabase import create_client
-    # supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
-    # 
-    # Get all expired documents
-    # expired = supabase.table('documents').select('file_path').lt('expires_at', 'now()').execute()
-    # 
-    # for doc in expired.data or []:
-    #     supabase.storage.from_('thesis-drafts').remove([doc['file_path']])
-    #     supabase.table('documents').delete().eq('id', doc['id']).execute()
-    
-    return {"status": "cleanup_complete"}
+    from core.supabase_client import get_supabase
+
+    supabase = get_supabase()
+
+    # One DELETE returning the removed rows replaces the per-document
+    # SELECT + remove + DELETE loop: N expired files cost one database
+    # round-trip plus one batched storage removal instead of 2N+1 calls
+    deleted = (
+        supabase.table("documents")
+        .delete()
+        .lt("expired_at", "now()")
+        .execute()
+    )
+
+    file_paths = [doc["file_path"] for doc in deleted.data or []]
+    if file_paths:
+        supabase.storage.from_(settings.STORAGE_BUCKET_NAME).remove(file_paths)
+
+    return {"status": "cleanup_complete", "removed": len(file_paths)}
 
 
 # Celery beat schedule (can be extended)